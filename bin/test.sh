@@ -8,5 +8,12 @@ until $(curl --noproxy 127.0.0.1 --silent --head --insecure --request GET https:
     sleep 1
 done
 
-docker-compose -f docker-compose-TEST.yml run web-test pytest
+# Databases created before the per-worker test databases existed never got this grant, so make sure it is there.
+docker-compose -f docker-compose-TEST.yml exec -T db-test sh -c 'MYSQL_PWD="$MYSQL_ROOT_PASSWORD" mysql -uroot -e "GRANT ALL PRIVILEGES ON \`SIP\\_test\\_%\`.* TO \"$MYSQL_USER\"@\"%\""' || {
+    echo "Could not grant the database user access to the SIP_test_ databases. Is the db-test container running?" >&2
+    docker-compose -f docker-compose-TEST.yml down
+    exit 1
+}
+
+docker-compose -f docker-compose-TEST.yml run web-test pytest -n auto --dist loadfile
 docker-compose -f docker-compose-TEST.yml down
@@ -5,4 +5,4 @@ while ! mysqladmin ping -h"db" -P"3306" --silent; do
     sleep 1
 done
 
-exec gunicorn -b 0.0.0.0:5000 manage:app
+exec gunicorn -b 0.0.0.0:5000 wsgi:app
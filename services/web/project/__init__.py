@@ -1,12 +1,19 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import sys
 
 from flask import Flask, url_for
+from flask.logging import default_handler
 from flask_admin import Admin
 from flask_admin import helpers as admin_helpers
 from flask_migrate import Migrate
 from flask_security import Security, SQLAlchemyUserDatastore
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import exc
+from sqlalchemy.orm import configure_mappers
 
 from project.forms import ExtendedLoginForm
 
@@ -53,6 +60,23 @@ class ReverseProxied(object):
         return self.app(environ, start_response)
 
 
+def warm_up(app):
+    """ Does the one-time setup work up front so the first request does not have to pay for it. """
+
+    # Resolve all of the model relationships.
+    configure_mappers()
+
+    # Open the first database connection. The database might not exist yet (such as when
+    # running the setup commands), so failing here is not fatal.
+    with app.app_context():
+        try:
+            db.session.query(models.IndicatorStatus.id).limit(1).all()
+        except exc.SQLAlchemyError:
+            app.logger.warning('Unable to warm up the database connection')
+        finally:
+            db.session.remove()
+
+
 def create_app():
 
     # Create the app
@@ -65,6 +89,20 @@ def create_app():
 
     # Set the logging level
     app.logger.setLevel(logging.INFO)
+
+    # Hand the log records off to a background thread so requests never block writing them out. The listener
+    # thread has no request context to find the WSGI error stream with, so give it a plain stderr handler in place
+    # of Flask's default one. Every app shares the 'flask.app' logger, so this only happens the first time through.
+    if default_handler in app.logger.handlers:
+        log_queue = queue.Queue(-1)
+        app.logger.removeHandler(default_handler)
+        app.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(default_handler.formatter)
+        listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
     app.logger.info('SIP starting')
 
     # Flask-SQLAlchemy
@@ -2,8 +2,8 @@ import gzip
 
 from flask import current_app, request, after_this_request
 from functools import wraps
-from jsonschema import validate
-from jsonschema.exceptions import SchemaError, ValidationError
+from jsonschema.exceptions import SchemaError, best_match
+from jsonschema.validators import validator_for
 from werkzeug.exceptions import BadRequest
 
 from project import db
@@ -138,19 +138,44 @@ def validate_json(function):
     return decorated_function
 
 
+# Validators are cached by the id() of their schema since the same schema dictionary is shared across many routes.
+# Each validator keeps a reference to its schema, so the id cannot be reused while it is in the cache.
+validators = {}
+
+
+def get_validator(schema):
+    """ Returns the cached validator for the given schema, creating it if needed. """
+
+    if id(schema) not in validators:
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        validators[id(schema)] = cls(schema)
+
+    return validators[id(schema)]
+
+
 def validate_schema(schema):
     """ Verifies that the request JSON conforms to the given schema """
 
+    # Look up the validator once when the route is decorated rather than on every request.
+    # jsonschema.validate() would otherwise check the schema and create a new validator each time.
+    schema_error = None
+    validator = None
+    try:
+        validator = get_validator(schema)
+    except SchemaError as e:
+        schema_error = e
+
     def decorator(function):
 
         @wraps(function)
         def decorated_function(*args, **kwargs):
-            try:
-                validate(request.json, schema)
-            except SchemaError as e:
-                return error_response(400, 'JSON schema is not valid: {}'.format(e.message))
-            except ValidationError as e:
-                return error_response(400, 'Request JSON does not match schema: {}'.format(e.message))
+            if schema_error:
+                return error_response(400, 'JSON schema is not valid: {}'.format(schema_error.message))
+
+            error = best_match(validator.iter_errors(request.json))
+            if error:
+                return error_response(400, 'Request JSON does not match schema: {}'.format(error.message))
             return function(*args, **kwargs)
         return decorated_function
 
@@ -1,3 +1,98 @@
+import ciso8601
+from dateutil.parser import parse
+from sqlalchemy import bindparam, literal, tuple_
+from sqlalchemy.ext import baked
+from sqlalchemy.orm import aliased, contains_eager, joinedload, selectinload
+
+from project import db
+from project.models import Campaign, Indicator, IntelReference, IntelSource
+
+bakery = baked.bakery()
+
+TRUE_STRINGS = frozenset(['1', 'true', 'y', 'yes', 'yep'])
+FALSE_STRINGS = frozenset(['0', 'false', 'n', 'no', 'nope'])
+
+
+def fetch_first(model, attr, value):
+    """ Returns the first object whose attribute equals the value, or None.
+
+    This is the same as model.query.filter_by(attr=value).first(), but the query is baked so
+    the SQL is only built and compiled once per model and attribute. """
+
+    query = bakery(lambda session: session.query(model), model, attr)
+    query += lambda q: q.filter(getattr(model, attr) == bindparam('value'))
+    return query(db.session()).params(value=value).first()
+
+
+def batch_fetch(model, attr, values):
+    """ Returns a dictionary of the given values mapped to their matching objects using a single query. """
+
+    values = list(dict.fromkeys(values))
+    if not values:
+        return {}
+
+    results = {}
+    for obj in model.query.filter(getattr(model, attr).in_(values)).order_by(model.id):
+        results.setdefault(getattr(obj, attr), obj)
+    return results
+
+
+def batch_fetch_references(items):
+    """ Returns a dictionary of the given source/reference pairs mapped to their IntelReference using a single query. """
+
+    pairs = list(dict.fromkeys((item['source'], item['reference']) for item in items))
+    if not pairs:
+        return {}
+
+    query = IntelReference.query.join(IntelSource, IntelReference.intel_source_id == IntelSource.id) \
+        .options(contains_eager(IntelReference.source)) \
+        .filter(tuple_(IntelSource.value, IntelReference.reference).in_(pairs))
+
+    results = {}
+    for obj in query.order_by(IntelReference.id):
+        results.setdefault((obj.source.value, obj.reference), obj)
+    return results
+
+
+def batch_lookup(lookups):
+    """ Returns a dictionary of the objects matching the given {name: (model, attr, value)} lookups using a single query.
+
+    Each lookup is outer joined onto a single anchor row, so the query always returns exactly one row
+    that contains None for any lookup that did not match. """
+
+    if not lookups:
+        return {}
+
+    names = list(lookups)
+    models = {name: aliased(lookups[name][0]) for name in names}
+
+    anchor = db.select([literal(1).label('anchor')]).alias('anchor')
+    query = db.session.query(anchor.c.anchor, *[models[name] for name in names]).select_from(anchor)
+    for name in names:
+        model, attr, value = lookups[name]
+        query = query.outerjoin(models[name], getattr(models[name], attr) == value)
+
+    # Skip the anchor column and pair the rest of the row with the lookup names.
+    return dict(zip(names, query.one()[1:]))
+
+
+def indicator_load_options():
+    """ Returns the query options that eager load everything Indicator.to_dict() uses.
+
+    Many-to-one relationships are joined into the main query and collections are loaded with one
+    SELECT ... WHERE IN per relationship instead of one lazy load per indicator. """
+
+    return (joinedload(Indicator.confidence),
+            joinedload(Indicator.impact),
+            joinedload(Indicator.status),
+            joinedload(Indicator.type),
+            joinedload(Indicator.user),
+            selectinload(Indicator.campaigns).selectinload(Campaign.aliases),
+            selectinload(Indicator.references).joinedload(IntelReference.source),
+            selectinload(Indicator.references).joinedload(IntelReference.user),
+            selectinload(Indicator.tags))
+
+
 def get_apikey(request):
     # Get the API key if there is one.
     # The header should look like:
@@ -14,16 +109,28 @@ def get_apikey(request):
     return None
 
 
+def parse_datetime(string, ignoretz=False):
+    """ Parses the string into a datetime. ISO 8601 strings take the fast path through ciso8601 and anything
+    else (such as the RFC 1123 dates the API returns) falls back to dateutil. """
+
+    try:
+        if ignoretz:
+            return ciso8601.parse_datetime_as_naive(string)
+        return ciso8601.parse_datetime(string)
+    except ValueError:
+        return parse(string, ignoretz=ignoretz)
+
+
 def parse_boolean(string, default=False):
-    string = str(string).lower()
+    if isinstance(string, bool):
+        return string
 
-    true = ['1', 'true', 'y', 'yes', 'yep']
-    false = ['0', 'false', 'n', 'no', 'nope']
+    string = str(string).lower()
 
-    if string in true:
+    if string in TRUE_STRINGS:
         return True
 
-    if string in false:
+    if string in FALSE_STRINGS:
         return False
 
     return default
@@ -1,8 +1,7 @@
 import datetime
 import gzip
-import json
 
-from dateutil.parser import parse
+import orjson
 from flask import current_app, jsonify, request, Response, url_for
 from sqlalchemy import and_, exc, func, or_
 
@@ -10,12 +9,16 @@ from project import db
 from project.api import bp
 from project.api.decorators import check_apikey, validate_json, validate_schema
 from project.api.errors import error_response
-from project.api.helpers import get_apikey, parse_boolean
+from project.api.helpers import batch_fetch, batch_fetch_references, batch_lookup, fetch_first, get_apikey, \
+    indicator_load_options, parse_boolean, parse_datetime
 from project.api.schemas import indicator_create, indicator_update, indicator_bulk_create
 from project.models import Campaign, Indicator, IndicatorConfidence, IndicatorImpact, IndicatorStatus, IndicatorType, \
     IntelReference, IntelSource, Tag, User, indicator_campaign_association, indicator_reference_association, \
     indicator_tag_association
 
+# The longest value an indicator can have, taken from the schema so the value filter cannot drift away from it.
+VALUE_MAX_LENGTH = indicator_create['properties']['value']['maxLength']
+
 """
 CREATE
 """
@@ -142,27 +145,38 @@ def create_indicator():
 
     data = request.get_json()
 
-    # Verify the user exists.
-    user = None
+    # Look up the user, type, confidence, impact, and status in a single query.
+    lookups = {'type': (IndicatorType, 'value', data['type'])}
     if 'username' in data:
-        user = User.query.filter_by(username=data['username']).first()
-        if not user:
-            return error_response(404, 'User not found by username')
+        lookups['user'] = (User, 'username', data['username'])
     else:
         apikey = get_apikey(request)
         if apikey:
-            user = User.query.filter_by(apikey=apikey).first()
-            if not user:
-                return error_response(404, 'User not found by API key')
+            lookups['user'] = (User, 'apikey', apikey)
         else:
             return error_response(401, 'You must supply either username or API key')
+    for name, model in (('confidence', IndicatorConfidence), ('impact', IndicatorImpact), ('status', IndicatorStatus)):
+        if name in data:
+            lookups[name] = (model, 'value', data[name])
+        else:
+            # The default value is the one with the lowest ID.
+            lookups[name] = (model, 'id', db.select([func.min(model.id)]).correlate(None).as_scalar())
+    found = batch_lookup(lookups)
+
+    # Verify the user exists.
+    user = found['user']
+    if not user:
+        if 'username' in data:
+            return error_response(404, 'User not found by username')
+        else:
+            return error_response(404, 'User not found by API key')
 
     # Verify the user is active.
     if not user.active:
         return error_response(401, 'Cannot create an indicator with an inactive user')
 
     # Verify the indicator type.
-    indicator_type = IndicatorType.query.filter_by(value=data['type']).first()
+    indicator_type = found['type']
     if not indicator_type:
         if current_app.config['INDICATOR_AUTO_CREATE_INDICATORTYPE']:
             indicator_type = IndicatorType(value=data['type'])
@@ -178,21 +192,21 @@ def create_indicator():
 
     # Verify this type+value does not already exist based off of case_sensitive.
     if case_sensitive:
-        existing = Indicator.query.filter(Indicator.type == indicator_type, func.binary(Indicator.value) == func.binary(data['value'])).first()
+        existing = db.session.query(Indicator.id).filter(Indicator.type == indicator_type, Indicator.value == data['value'], func.binary(Indicator.value) == func.binary(data['value'])).first()
         if existing:
             return error_response(409, 'Case-sensitive indicator already exists')
     else:
-        existing = Indicator.query.filter(Indicator.type == indicator_type, func.lower(Indicator.value) == func.lower(data['value'])).first()
+        existing = db.session.query(Indicator.id).filter(Indicator.type == indicator_type, func.lower(Indicator.value) == func.lower(data['value'])).first()
         if existing:
             return error_response(409, 'Case-insensitive indicator already exists')
 
     # Verify the confidence (has default).
     if 'confidence' not in data:
-        confidence = IndicatorConfidence.query.order_by(IndicatorConfidence.id).limit(1).first()
+        confidence = found['confidence']
         if not confidence:
             return error_response(400, 'No indicator confidence values exist to use as default')
     else:
-        confidence = IndicatorConfidence.query.filter_by(value=data['confidence']).first()
+        confidence = found['confidence']
         if not confidence:
             if current_app.config['INDICATOR_AUTO_CREATE_INDICATORCONFIDENCE']:
                 confidence = IndicatorConfidence(value=data['confidence'])
@@ -202,11 +216,11 @@ def create_indicator():
 
     # Verify the impact (has default).
     if 'impact' not in data:
-        impact = IndicatorImpact.query.order_by(IndicatorImpact.id).limit(1).first()
+        impact = found['impact']
         if not impact:
             return error_response(400, 'No indicator impact values exist to use as default')
     else:
-        impact = IndicatorImpact.query.filter_by(value=data['impact']).first()
+        impact = found['impact']
         if not impact:
             if current_app.config['INDICATOR_AUTO_CREATE_INDICATORIMPACT']:
                 impact = IndicatorImpact(value=data['impact'])
@@ -216,11 +230,11 @@ def create_indicator():
 
     # Verify the status (has default).
     if 'status' not in data:
-        status = IndicatorStatus.query.order_by(IndicatorStatus.id).limit(1).first()
+        status = found['status']
         if not status:
             return error_response(400, 'No indicator status values exist to use as default')
     else:
-        status = IndicatorStatus.query.filter_by(value=data['status']).first()
+        status = found['status']
         if not status:
             if current_app.config['INDICATOR_AUTO_CREATE_INDICATORSTATUS']:
                 status = IndicatorStatus(value=data['status'])
@@ -246,49 +260,50 @@ def create_indicator():
 
     # Verify any campaign that was specified.
     if 'campaigns' in data:
+        campaigns = batch_fetch(Campaign, 'name', data['campaigns'])
         for value in data['campaigns']:
-            campaign = Campaign.query.filter_by(name=value).first()
-            if not campaign:
+            if value not in campaigns:
                 if current_app.config['INDICATOR_AUTO_CREATE_CAMPAIGN']:
-                    campaign = Campaign(name=value)
-                    db.session.add(campaign)
+                    campaigns[value] = Campaign(name=value)
+                    db.session.add(campaigns[value])
                 else:
                     return error_response(404, 'Campaign not found: {}'.format(value))
 
-            indicator.campaigns.append(campaign)
+        indicator.campaigns = [campaigns[value] for value in data['campaigns']]
 
     # Verify any references that were specified.
     if 'references' in data:
-        for item in data['references']:
-            reference = IntelReference.query.filter(and_(IntelReference.reference == item['reference'],
-                                                         IntelReference.source.has(
-                                                             IntelSource.value == item['source']))).first()
-            if not reference:
-                if current_app.config['INDICATOR_AUTO_CREATE_INTELREFERENCE']:
-                    source = IntelSource.query.filter_by(value=item['source']).first()
-                    if not source:
-                        source = IntelSource(value=item['source'])
-                        db.session.add(source)
-
-                    reference = IntelReference(reference=item['reference'], source=source, user=user)
+        references = batch_fetch_references(data['references'])
+        missing = [item for item in data['references'] if (item['source'], item['reference']) not in references]
+        if missing:
+            if not current_app.config['INDICATOR_AUTO_CREATE_INTELREFERENCE']:
+                return error_response(404, 'Intel reference not found: {}'.format(missing[0]['reference']))
+
+            sources = batch_fetch(IntelSource, 'value', [item['source'] for item in missing])
+            for item in missing:
+                if item['source'] not in sources:
+                    sources[item['source']] = IntelSource(value=item['source'])
+                    db.session.add(sources[item['source']])
+
+                if (item['source'], item['reference']) not in references:
+                    reference = IntelReference(reference=item['reference'], source=sources[item['source']], user=user)
                     db.session.add(reference)
-                else:
-                    return error_response(404, 'Intel reference not found: {}'.format(item['reference']))
+                    references[(item['source'], item['reference'])] = reference
 
-            indicator.references.append(reference)
+        indicator.references = [references[(item['source'], item['reference'])] for item in data['references']]
 
     # Verify any tags that were specified.
     if 'tags' in data:
+        tags = batch_fetch(Tag, 'value', data['tags'])
         for value in data['tags']:
-            tag = Tag.query.filter_by(value=value).first()
-            if not tag:
+            if value not in tags:
                 if current_app.config['INDICATOR_AUTO_CREATE_TAG']:
-                    tag = Tag(value=value)
-                    db.session.add(tag)
+                    tags[value] = Tag(value=value)
+                    db.session.add(tags[value])
                 else:
                     return error_response(404, 'Tag not found: {}'.format(value))
 
-            indicator.tags.append(tag)
+        indicator.tags = [tags[value] for value in data['tags']]
 
     db.session.add(indicator)
     db.session.commit()
@@ -417,7 +432,7 @@ def create_indicators():
             if data['username'] in cache['usernames']:
                 user = cache['usernames'][data['username']]
             else:
-                user = User.query.filter_by(username=data['username']).first()
+                user = fetch_first(User, 'username', data['username'])
                 if not user:
                     return error_response(404, 'User not found by username')
 
@@ -431,7 +446,7 @@ def create_indicators():
                 if apikey in cache['apikeys']:
                     user = cache['apikeys'][apikey]
                 else:
-                    user = User.query.filter_by(apikey=apikey).first()
+                    user = fetch_first(User, 'apikey', apikey)
                     if not user:
                         return error_response(404, 'User not found by API key')
 
@@ -449,7 +464,7 @@ def create_indicators():
             indicator_type = cache['types'][data['type']]
         else:
             # Verify the indicator type.
-            indicator_type = IndicatorType.query.filter_by(value=data['type']).first()
+            indicator_type = fetch_first(IndicatorType, 'value', data['type'])
             if not indicator_type:
                 if current_app.config['INDICATOR_AUTO_CREATE_INDICATORTYPE']:
                     indicator_type = IndicatorType(value=data['type'])
@@ -468,11 +483,11 @@ def create_indicators():
 
         # Verify this type+value does not already exist based off of case_sensitive.
         if case_sensitive:
-            existing = Indicator.query.filter(Indicator.type == indicator_type, func.binary(Indicator.value) == func.binary(data['value'])).first()
+            existing = db.session.query(Indicator.id).filter(Indicator.type == indicator_type, Indicator.value == data['value'], func.binary(Indicator.value) == func.binary(data['value'])).first()
             if existing:
                 continue
         else:
-            existing = Indicator.query.filter(Indicator.type == indicator_type, func.lower(Indicator.value) == func.lower(data['value'])).first()
+            existing = db.session.query(Indicator.id).filter(Indicator.type == indicator_type, func.lower(Indicator.value) == func.lower(data['value'])).first()
             if existing:
                 continue
 
@@ -493,7 +508,7 @@ def create_indicators():
             if data['confidence'] in cache['confidences']:
                 confidence = cache['confidences'][data['confidence']]
             else:
-                confidence = IndicatorConfidence.query.filter_by(value=data['confidence']).first()
+                confidence = fetch_first(IndicatorConfidence, 'value', data['confidence'])
                 if not confidence:
                     if current_app.config['INDICATOR_AUTO_CREATE_INDICATORCONFIDENCE']:
                         confidence = IndicatorConfidence(value=data['confidence'])
@@ -521,7 +536,7 @@ def create_indicators():
             if data['impact'] in cache['impacts']:
                 impact = cache['impacts'][data['impact']]
             else:
-                impact = IndicatorImpact.query.filter_by(value=data['impact']).first()
+                impact = fetch_first(IndicatorImpact, 'value', data['impact'])
                 if not impact:
                     if current_app.config['INDICATOR_AUTO_CREATE_INDICATORIMPACT']:
                         impact = IndicatorImpact(value=data['impact'])
@@ -549,7 +564,7 @@ def create_indicators():
             if data['status'] in cache['statuses']:
                 status = cache['statuses'][data['status']]
             else:
-                status = IndicatorStatus.query.filter_by(value=data['status']).first()
+                status = fetch_first(IndicatorStatus, 'value', data['status'])
                 if not status:
                     if current_app.config['INDICATOR_AUTO_CREATE_INDICATORSTATUS']:
                         status = IndicatorStatus(value=data['status'])
@@ -578,12 +593,13 @@ def create_indicators():
 
         # Verify any campaign that was specified.
         if 'campaigns' in data:
+            indicator_campaigns = []
             for value in data['campaigns']:
                 # Check the cache for this campaign.
                 if value in cache['campaigns']:
                     campaign = cache['campaigns'][value]
                 else:
-                    campaign = Campaign.query.filter_by(name=value).first()
+                    campaign = fetch_first(Campaign, 'name', value)
                     if not campaign:
                         if current_app.config['INDICATOR_AUTO_CREATE_CAMPAIGN']:
                             campaign = Campaign(name=value)
@@ -594,10 +610,12 @@ def create_indicators():
                     # Add this campaign to the cache.
                     cache['campaigns'][value] = campaign
 
-                indicator.campaigns.append(campaign)
+                indicator_campaigns.append(campaign)
+            indicator.campaigns = indicator_campaigns
 
         # Verify any references that were specified.
         if 'references' in data:
+            indicator_references = []
             for item in data['references']:
 
                 # Check the cache for this source+reference pair.
@@ -614,7 +632,7 @@ def create_indicators():
                             if item['source'] in cache['sources']:
                                 source = cache['sources'][item['source']]
                             else:
-                                source = IntelSource.query.filter_by(value=item['source']).first()
+                                source = fetch_first(IntelSource, 'value', item['source'])
                                 if not source:
                                     source = IntelSource(value=item['source'])
                                     db.session.add(source)
@@ -630,17 +648,19 @@ def create_indicators():
                     # Add this reference to the cache.
                     cache['references']['{}{}'.format(item['source'], item['reference'])] = reference
 
-                indicator.references.append(reference)
+                indicator_references.append(reference)
+            indicator.references = indicator_references
 
         # Verify any tags that were specified.
         if 'tags' in data:
+            indicator_tags = []
             for value in data['tags']:
 
                 # Check the cache for this tag.
                 if value in cache['tags']:
                     tag = cache['tags'][value]
                 else:
-                    tag = Tag.query.filter_by(value=value).first()
+                    tag = fetch_first(Tag, 'value', value)
                     if not tag:
                         if current_app.config['INDICATOR_AUTO_CREATE_TAG']:
                             tag = Tag(value=value)
@@ -651,7 +671,8 @@ def create_indicators():
                     # Add this tag to the cache.
                     cache['tags'][value] = tag
 
-                indicator.tags.append(tag)
+                indicator_tags.append(tag)
+            indicator.tags = indicator_tags
 
         db.session.add(indicator)
 
@@ -740,15 +761,19 @@ def read_indicator(indicator_id):
     :reqheader Authorization: Optional Apikey value
     :resheader Content-Type: application/json
     :status 200: Indicator found
+    :status 304: Indicator has not changed since the given ETag
     :status 401: Invalid role to perform this action
     :status 404: Indicator ID not found
     """
 
-    indicator = Indicator.query.get(indicator_id)
+    indicator = Indicator.query.options(*indicator_load_options()).get(indicator_id)
     if not indicator:
         return error_response(404, 'Indicator ID not found')
 
-    return jsonify(indicator.to_dict())
+    # The ETag is a hash of the body, so it changes along with anything the body includes.
+    response = jsonify(indicator.to_dict())
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 @bp.route('/indicators', methods=['GET'])
@@ -830,6 +855,7 @@ def read_indicators():
     :query users: Comma-separated list of usernames of the associated references. Supports [OR].
     :query value: String found in value (uses wildcard search)
     :status 200: Indicators found
+    :status 400: Value filter is too long
     :status 401: Invalid role to perform this action
     """
 
@@ -858,7 +884,7 @@ def read_indicators():
     # Created after filter
     if 'created_after' in request.args:
         try:
-            created_after = parse(request.args.get('created_after'), ignoretz=True)
+            created_after = parse_datetime(request.args.get('created_after'), ignoretz=True)
         except (ValueError, OverflowError):
             created_after = datetime.date.max
         filters.append(created_after < Indicator.created_time)
@@ -866,7 +892,7 @@ def read_indicators():
     # Created before filter
     if 'created_before' in request.args:
         try:
-            created_before = parse(request.args.get('created_before'), ignoretz=True)
+            created_before = parse_datetime(request.args.get('created_before'), ignoretz=True)
         except (ValueError, OverflowError):
             created_before = datetime.date.min
         filters.append(Indicator.created_time < created_before)
@@ -885,7 +911,7 @@ def read_indicators():
     # Modified after filter
     if 'modified_after' in request.args:
         try:
-            modified_after = parse(request.args.get('modified_after'))
+            modified_after = parse_datetime(request.args.get('modified_after'))
         except (ValueError, OverflowError):
             modified_after = datetime.date.max
         filters.append(modified_after < Indicator.modified_time)
@@ -893,7 +919,7 @@ def read_indicators():
     # Modified before filter
     if 'modified_before' in request.args:
         try:
-            modified_before = parse(request.args.get('modified_before'))
+            modified_before = parse_datetime(request.args.get('modified_before'))
         except (ValueError, OverflowError):
             modified_before = datetime.date.min
         filters.append(Indicator.modified_time < modified_before)
@@ -1150,7 +1176,11 @@ def read_indicators():
                 filters.append(or_(*user_filters))
 
     # Value filter
-    if 'value' in request.args:
+    # The leading wildcard means this filter cannot use an index and must scan every indicator value. An empty
+    # value would match everything anyway, so skip it, and reject values longer than an indicator can be.
+    if request.args.get('value'):
+        if len(request.args.get('value')) > VALUE_MAX_LENGTH:
+            return error_response(400, 'Value filter cannot be longer than {} characters'.format(VALUE_MAX_LENGTH))
         filters.append(Indicator.value.like('%{}%'.format(request.args.get('value'))))
 
     # If count is enabled, just return the number of results rather than the results themselves.
@@ -1207,7 +1237,7 @@ def read_indicators():
     data = [{'id': x[0], 'type': x[1], 'value': x[2]} for x in results]
 
     # Compress and return the JSON results.
-    data = json.dumps(data).encode('utf-8')
+    data = orjson.dumps(data)
     response = Response(status=200, mimetype='application/json')
     response.data = gzip.compress(data)
     response.headers['Content-Encoding'] = 'gzip'
@@ -1322,16 +1352,25 @@ def update_indicator(indicator_id):
     if not indicator:
         return error_response(404, 'Indicator ID not found')
 
+    # Look up any confidence, impact, status, and username in a single query.
+    lookups = {}
+    for name, model in (('confidence', IndicatorConfidence), ('impact', IndicatorImpact), ('status', IndicatorStatus)):
+        if name in data:
+            lookups[name] = (model, 'value', data[name])
+    if 'username' in data:
+        lookups['user'] = (User, 'username', data['username'])
+    found = batch_lookup(lookups)
+
     # Verify campaigns if it was specified.
     if 'campaigns' in data:
+        campaigns = batch_fetch(Campaign, 'name', data['campaigns'])
         valid_campaigns = []
         for value in data['campaigns']:
 
             # Verify each campaign is actually valid.
-            campaign = Campaign.query.filter_by(name=value).first()
-            if not campaign:
-                error_response(404, 'Campaign not found: {}'.format(value))
-            valid_campaigns.append(campaign)
+            if value not in campaigns:
+                return error_response(404, 'Campaign not found: {}'.format(value))
+            valid_campaigns.append(campaigns[value])
         if valid_campaigns:
             indicator.campaigns = valid_campaigns
 
@@ -1341,35 +1380,33 @@ def update_indicator(indicator_id):
 
     # Verify confidence if it was specified
     if 'confidence' in data:
-        confidence = IndicatorConfidence.query.filter_by(value=data['confidence']).first()
+        confidence = found['confidence']
         if not confidence:
             return error_response(404, 'Indicator confidence not found: {}'.format(data['confidence']))
         indicator.confidence = confidence
 
     # Verify impact if it was specified
     if 'impact' in data:
-        impact = IndicatorImpact.query.filter_by(value=data['impact']).first()
+        impact = found['impact']
         if not impact:
             return error_response(404, 'Indicator impact not found: {}'.format(data['impact']))
         indicator.impact = impact
 
     # Verify any references that were specified.
     if 'references' in data:
+        references = batch_fetch_references(data['references'])
         valid_references = []
         for item in data['references']:
-            reference = IntelReference.query.filter(and_(IntelReference.reference == item['reference'],
-                                                         IntelReference.source.has(
-                                                             IntelSource.value == item['source']))).first()
-            if not reference:
+            if (item['source'], item['reference']) not in references:
                 return error_response(404, 'Intel reference not found: {}'.format(item['reference']))
-            valid_references.append(reference)
+            valid_references.append(references[(item['source'], item['reference'])])
 
         if valid_references:
             indicator.references = valid_references
 
     # Verify status if it was specified
     if 'status' in data:
-        status = IndicatorStatus.query.filter_by(value=data['status']).first()
+        status = found['status']
         if not status:
             return error_response(404, 'Indicator status not found: {}'.format(data['status']))
         indicator.status = status
@@ -1380,20 +1417,20 @@ def update_indicator(indicator_id):
 
     # Verify tags if it was specified.
     if 'tags' in data:
+        tags = batch_fetch(Tag, 'value', data['tags'])
         valid_tags = []
         for value in data['tags']:
 
             # Verify each tag is actually valid.
-            tag = Tag.query.filter_by(value=value).first()
-            if not tag:
-                error_response(404, 'Tag not found: {}'.format(value))
-            valid_tags.append(tag)
+            if value not in tags:
+                return error_response(404, 'Tag not found: {}'.format(value))
+            valid_tags.append(tags[value])
         if valid_tags:
             indicator.tags = valid_tags
 
     # Verify username if one was specified.
     if 'username' in data:
-        user = User.query.filter_by(username=data['username']).first()
+        user = found['user']
         if not user:
             return error_response(404, 'User username not found: {}'.format(data['username']))
 
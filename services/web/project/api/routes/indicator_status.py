@@ -57,7 +57,7 @@ def create_indicator_status():
     data = request.get_json()
 
     # Verify this value does not already exist.
-    existing = IndicatorStatus.query.filter_by(value=data['value']).first()
+    existing = db.session.query(IndicatorStatus.id).filter_by(value=data['value']).first()
     if existing:
         return error_response(409, 'Indicator status already exists')
 
@@ -108,6 +108,7 @@ def read_indicator_status(indicator_status_id):
     :reqheader Authorization: Optional Apikey value
     :resheader Content-Type: application/json
     :status 200: Indicator status found
+    :status 304: Indicator status has not changed since the given ETag
     :status 401: Invalid role to perform this action
     :status 404: Indicator status ID not found
     """
@@ -116,7 +117,9 @@ def read_indicator_status(indicator_status_id):
     if not indicator_status:
         return error_response(404, 'Indicator status ID not found')
 
-    return jsonify(indicator_status.to_dict())
+    response = jsonify(indicator_status.to_dict())
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 @bp.route('/indicators/status', methods=['GET'])
@@ -155,11 +158,14 @@ def read_indicator_statuses():
     :reqheader Authorization: Optional Apikey value
     :resheader Content-Type: application/json
     :status 200: Indicator statuses found
+    :status 304: Indicator statuses have not changed since the given ETag
     :status 401: Invalid role to perform this action
     """
 
     data = IndicatorStatus.query.all()
-    return jsonify([item.to_dict() for item in data])
+    response = jsonify([item.to_dict() for item in data])
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 """
@@ -217,7 +223,7 @@ def update_indicator_status(indicator_status_id):
         return error_response(404, 'Indicator status ID not found')
 
     # Verify this value does not already exist.
-    existing = IndicatorStatus.query.filter_by(value=data['value']).first()
+    existing = db.session.query(IndicatorStatus.id).filter_by(value=data['value']).first()
     if existing:
         return error_response(409, 'Indicator status already exists')
 
@@ -261,12 +267,12 @@ def delete_indicator_status(indicator_status_id):
     :status 409: Unable to delete indicator status due to foreign key constraints
     """
 
-    indicator_status = IndicatorStatus.query.get(indicator_status_id)
-    if not indicator_status:
-        return error_response(404, 'Indicator status ID not found')
-
+    # Nothing cascades from a status, so delete it directly and use the row count to tell if it existed.
     try:
-        db.session.delete(indicator_status)
+        deleted = IndicatorStatus.query.filter_by(id=indicator_status_id).delete()
+        if not deleted:
+            return error_response(404, 'Indicator status ID not found')
+
         db.session.commit()
     except exc.IntegrityError:
         db.session.rollback()
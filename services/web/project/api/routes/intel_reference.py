@@ -5,7 +5,7 @@ from project import db
 from project.api import bp
 from project.api.decorators import check_apikey, validate_json, validate_schema
 from project.api.errors import error_response
-from project.api.helpers import get_apikey
+from project.api.helpers import get_apikey, indicator_load_options
 from project.api.schemas import intel_reference_create, intel_reference_update
 from project.models import IntelReference, IntelSource, User
 
@@ -222,7 +222,7 @@ def read_intel_references():
     :status 401: Invalid role to perform this action
     """
 
-    filters = set()
+    filters = []
     data = IntelReference.to_collection_dict(IntelReference.query.filter(*filters), 'api.read_intel_references', **request.args)
     return jsonify(data)
 
@@ -329,7 +329,8 @@ def read_intel_reference_indicators(intel_reference_id):
     args = dict(request.args.copy())
     args['intel_reference_id'] = intel_reference.id
 
-    data = IntelReference.to_collection_dict(intel_reference.indicators, 'api.read_intel_reference_indicators', **args)
+    indicators = intel_reference.indicators.options(*indicator_load_options())
+    data = IntelReference.to_collection_dict(indicators, 'api.read_intel_reference_indicators', **args)
     return jsonify(data)
 
 
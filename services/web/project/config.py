@@ -14,6 +14,9 @@ class BaseConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
 
+    # Have the web server resolve the models and open a database connection before the first request arrives.
+    WARM_ON_START = True
+
     # Flask-JWT-Extended
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
     JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(days=1)
@@ -95,8 +98,30 @@ class DevelopmentConfig(BaseConfig):
 
 class TestingConfig(BaseConfig):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    WARM_ON_START = False
+
+    # Without a DATABASE_URL the tests run against an in-memory SQLite database.
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite://')
+
+    # Against a database server, keep a small pool of connections open for the whole run. The run is too short
+    # for the connections to go stale, so skip checking them before they are used.
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': 5,
+            'max_overflow': 0,
+            'pool_pre_ping': False,
+            'pool_recycle': -1
+        }
 
 
 class ProductionConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+
+    # Keep enough connections open to absorb bursts of API clients, replace them before MySQL's
+    # wait_timeout closes them, and make sure each one is still alive before it gets used.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 20,
+        'max_overflow': 40,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True
+    }
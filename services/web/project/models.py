@@ -181,6 +181,9 @@ class CampaignAlias(db.Model):
 
 class Indicator(PaginatedAPIMixin, db.Model):
     __tablename__ = 'indicator'
+    __table_args__ = (
+        db.Index('ix_indicator_type_id_value', 'type_id', 'value', mysql_length={'value': 255}),
+    )
 
     id = db.Column(db.Integer, primary_key=True, nullable=False)
     campaigns = db.relationship('Campaign', secondary=indicator_campaign_association)
@@ -1063,9 +1063,15 @@ def test_create(client):
     assert sorted(response['tags']) == ['nanocore', 'phish']
 
 
-def test_create_bulk(client):
+def test_create_bulk(app, client):
     """ Ensure a proper request actually works """
 
+    app.config['INDICATOR_AUTO_CREATE_CAMPAIGN'] = True
+    app.config['INDICATOR_AUTO_CREATE_INDICATORCONFIDENCE'] = True
+    app.config['INDICATOR_AUTO_CREATE_INDICATORIMPACT'] = True
+    app.config['INDICATOR_AUTO_CREATE_INDICATORSTATUS'] = True
+    app.config['INDICATOR_AUTO_CREATE_INDICATORTYPE'] = True
+
     data = {'indicators': [
         {'type': 'asdf',
          'value': 'asdf',
@@ -1192,6 +1198,21 @@ def test_read_by_id(client):
     assert response['user'] == 'analyst'
 
 
+def test_read_by_id_etag(client):
+    """ Ensure reading an indicator by its ID honors its ETag """
+
+    request, response = create_indicator(client, 'asdf', 'asdf', 'analyst')
+    _id = response['id']
+    assert request.status_code == 201
+
+    request = client.get('/api/indicators/{}'.format(_id))
+    etag = request.headers['ETag']
+    assert request.status_code == 200
+
+    request = client.get('/api/indicators/{}'.format(_id), headers={'If-None-Match': etag})
+    assert request.status_code == 304
+
+
 def test_read_with_filters(client):
     """ Ensure indicators can be read using the various filters """
 
@@ -1540,6 +1561,30 @@ def test_read_with_filters(client):
     assert len(response) == 1
 
 
+def test_read_with_value_filter_too_long(client):
+    """ Ensure the value filter cannot be longer than 512 characters """
+
+    request = client.get('/api/indicators?value={}'.format('a' * 513))
+    response = json.loads(request.data.decode())
+    assert request.status_code == 400
+    assert response['msg'] == 'Value filter cannot be longer than 512 characters'
+
+
+def test_read_with_empty_value_filter(client):
+    """ Ensure an empty value filter is ignored """
+
+    request, response = create_indicator(client, 'IP', '1.1.1.1', 'analyst')
+    assert request.status_code == 201
+    request, response = create_indicator(client, 'Email - Address', 'asdf@asdf.com', 'analyst')
+    assert request.status_code == 201
+
+    request = client.get('/api/indicators?value=')
+    response = gzip.decompress(request.data)
+    response = json.loads(response.decode('utf-8'))
+    assert request.status_code == 200
+    assert len(response) == 2
+
+
 """
 UPDATE TESTS
 """
@@ -1796,6 +1841,34 @@ def test_update_nonexistent_username(client):
     assert 'User username not found:' in response['msg']
 
 
+def test_update_nonexistent_campaign(client):
+    """ Ensure an indicator cannot be updated with a nonexistent campaign """
+
+    request, response = create_indicator(client, 'asdf', 'asdf', 'analyst')
+    _id = response['id']
+    assert request.status_code == 201
+
+    data = {'campaigns': ['this_campaign_does_not_exist']}
+    request = client.put('/api/indicators/{}'.format(_id), json=data)
+    response = json.loads(request.data.decode())
+    assert request.status_code == 404
+    assert response['msg'] == 'Campaign not found: this_campaign_does_not_exist'
+
+
+def test_update_nonexistent_tag(client):
+    """ Ensure an indicator cannot be updated with a nonexistent tag """
+
+    request, response = create_indicator(client, 'asdf', 'asdf', 'analyst')
+    _id = response['id']
+    assert request.status_code == 201
+
+    data = {'tags': ['this_tag_does_not_exist']}
+    request = client.put('/api/indicators/{}'.format(_id), json=data)
+    response = json.loads(request.data.decode())
+    assert request.status_code == 404
+    assert response['msg'] == 'Tag not found: this_tag_does_not_exist'
+
+
 def test_update_inactive_username(client):
     """ Ensure an indicator cannot be updated with an inactive username """
 
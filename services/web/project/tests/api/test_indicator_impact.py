@@ -1,7 +1,94 @@
+import pytest
+
+from project.models import IndicatorImpact
 from project.tests.conftest import TEST_ANALYST_APIKEY, TEST_INACTIVE_APIKEY, TEST_INVALID_APIKEY
 from project.tests.helpers import *
 
 
+# The HTTP method, config key, required role and URL of each endpoint.
+ENDPOINTS = [
+    ('post', 'POST', 'analyst', '/api/indicators/impact'),
+    ('get', 'GET', 'analyst', '/api/indicators/impact/1'),
+    ('put', 'PUT', 'analyst', '/api/indicators/impact/1'),
+    ('delete', 'DELETE', 'admin', '/api/indicators/impact/1')
+]
+ENDPOINT_IDS = ['create', 'read', 'update', 'delete']
+
+
+"""
+API KEY TESTS
+"""
+
+
+@pytest.mark.readonly
+@pytest.mark.parametrize('method,config_key,role,url', ENDPOINTS, ids=ENDPOINT_IDS)
+def test_missing_api_key(app, client, method, config_key, role, url):
+    """ Ensure an API key is given if the config requires it """
+
+    app.config[config_key] = role
+
+    request = getattr(client, method)(url)
+    response = request.get_json()
+    assert request.status_code == 401
+    assert response['msg'] == 'Bad or missing API key'
+
+
+@pytest.mark.readonly
+@pytest.mark.parametrize('method,config_key,role,url', ENDPOINTS, ids=ENDPOINT_IDS)
+def test_invalid_api_key(app, client, method, config_key, role, url):
+    """ Ensure an API key not found in the database does not work """
+
+    app.config[config_key] = role
+
+    headers = {'Authorization': 'Apikey ' + TEST_INVALID_APIKEY}
+    request = getattr(client, method)(url, headers=headers)
+    response = request.get_json()
+    assert request.status_code == 401
+    assert response['msg'] == 'API user does not exist'
+
+
+@pytest.mark.readonly
+@pytest.mark.parametrize('method,config_key,role,url', ENDPOINTS, ids=ENDPOINT_IDS)
+def test_inactive_api_key(app, client, method, config_key, role, url):
+    """ Ensure an inactive API key does not work """
+
+    app.config[config_key] = role
+
+    headers = {'Authorization': 'Apikey ' + TEST_INACTIVE_APIKEY}
+    request = getattr(client, method)(url, headers=headers)
+    response = request.get_json()
+    assert request.status_code == 401
+    assert response['msg'] == 'API user is not active'
+
+
+@pytest.mark.readonly
+@pytest.mark.parametrize('method,config_key,url',
+                         [(method, config_key, url) for method, config_key, _, url in ENDPOINTS],
+                         ids=ENDPOINT_IDS)
+def test_invalid_role(app, client, method, config_key, url):
+    """ Ensure the given API key has the proper role access """
+
+    app.config[config_key] = 'user_does_not_have_this_role'
+
+    headers = {'Authorization': 'Apikey ' + TEST_ANALYST_APIKEY}
+    request = getattr(client, method)(url, headers=headers)
+    response = request.get_json()
+    assert request.status_code == 401
+    assert response['msg'] == 'Insufficient privileges'
+
+
+@pytest.mark.readonly
+@pytest.mark.parametrize('method,data', [('get', None), ('put', {'value': 'asdf'}), ('delete', None)],
+                         ids=['read', 'update', 'delete'])
+def test_nonexistent_id(client, method, data):
+    """ Ensure a nonexistent ID does not work """
+
+    request = getattr(client, method)('/api/indicators/impact/100000', json=data)
+    response = request.get_json()
+    assert request.status_code == 404
+    assert response['msg'] == 'Indicator impact ID not found'
+
+
 """
 CREATE TESTS
 """
@@ -13,42 +100,42 @@ def test_create_schema(client):
     # Invalid JSON
     data = {}
     request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert response['msg'] == 'Request must include valid JSON'
 
     # Missing required value parameter
     data = {'asdf': 'asdf'}
     request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert response['msg'] == "Request JSON does not match schema: 'value' is a required property"
 
     # Additional parameter
     data = {'value': 'asdf', 'asdf': 'asdf'}
     request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert 'Additional properties are not allowed' in response['msg']
 
     # Invalid value parameter type
     data = {'value': 1}
     request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert "1 is not of type 'string'" in response['msg']
 
     # value parameter too short
     data = {'value': ''}
     request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert 'too short' in response['msg']
 
     # value parameter too long
     data = {'value': 'a' * 256}
     request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert 'too long' in response['msg']
 
@@ -62,58 +149,11 @@ def test_create_duplicate(client):
 
     data = {'value': 'asdf'}
     request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 409
     assert response['msg'] == 'Indicator impact already exists'
 
 
-def test_create_missing_api_key(app, client):
-    """ Ensure an API key is given if the config requires it """
-
-    app.config['POST'] = 'analyst'
-
-    request = client.post('/api/indicators/impact')
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'Bad or missing API key'
-
-
-def test_create_invalid_api_key(app, client):
-    """ Ensure an API key not found in the database does not work """
-
-    app.config['POST'] = 'analyst'
-
-    headers = {'Authorization': 'Apikey ' + TEST_INVALID_APIKEY}
-    request = client.post('/api/indicators/impact', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'API user does not exist'
-
-
-def test_create_inactive_api_key(app, client):
-    """ Ensure an inactive API key does not work """
-
-    app.config['POST'] = 'analyst'
-
-    headers = {'Authorization': 'Apikey ' + TEST_INACTIVE_APIKEY}
-    request = client.post('/api/indicators/impact', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'API user is not active'
-
-
-def test_create_invalid_role(app, client):
-    """ Ensure the given API key has the proper role access """
-
-    app.config['POST'] = 'user_does_not_have_this_role'
-
-    headers = {'Authorization': 'Apikey ' + TEST_ANALYST_APIKEY}
-    request = client.post('/api/indicators/impact', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'Insufficient privileges'
-
-
 def test_create(client):
     """ Ensure a proper request actually works """
 
@@ -127,94 +167,25 @@ READ TESTS
 """
 
 
-def test_read_nonexistent_id(client):
-    """ Ensure a nonexistent ID does not work """
-
-    request = client.get('/api/indicators/impact/100000')
-    response = json.loads(request.data.decode())
-    assert request.status_code == 404
-    assert response['msg'] == 'Indicator impact ID not found'
-
-
-def test_read_missing_api_key(app, client):
-    """ Ensure an API key is given if the config requires it """
-
-    app.config['GET'] = 'analyst'
-
-    request = client.get('/api/indicators/impact/1')
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'Bad or missing API key'
-
-
-def test_read_invalid_api_key(app, client):
-    """ Ensure an API key not found in the database does not work """
-
-    app.config['GET'] = 'analyst'
-
-    headers = {'Authorization': 'Apikey ' + TEST_INVALID_APIKEY}
-    request = client.get('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'API user does not exist'
-
-
-def test_read_inactive_api_key(app, client):
-    """ Ensure an inactive API key does not work """
-
-    app.config['GET'] = 'analyst'
-
-    headers = {'Authorization': 'Apikey ' + TEST_INACTIVE_APIKEY}
-    request = client.get('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'API user is not active'
-
-
-def test_read_invalid_role(app, client):
-    """ Ensure the given API key has the proper role access """
-
-    app.config['GET'] = 'user_does_not_have_this_role'
-
-    headers = {'Authorization': 'Apikey ' + TEST_ANALYST_APIKEY}
-    request = client.get('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'Insufficient privileges'
-
-
-def test_read_all_values(client):
+def test_read_all_values(client, session):
     """ Ensure all values properly return """
 
-    data = {'value': 'asdf'}
-    request = client.post('/api/indicators/impact', json=data)
-    assert request.status_code == 201
-
-    data = {'value': 'asdf2'}
-    request = client.post('/api/indicators/impact', json=data)
-    assert request.status_code == 201
-
-    data = {'value': 'asdf3'}
-    request = client.post('/api/indicators/impact', json=data)
-    assert request.status_code == 201
+    session.bulk_save_objects([IndicatorImpact(value=value) for value in ['asdf', 'asdf2', 'asdf3']])
+    session.commit()
 
     request = client.get('/api/indicators/impact')
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 200
     assert len(response) == 3
 
 
-def test_read_by_id(client):
+def test_read_by_id(client, existing_impact):
     """ Ensure names can be read by their ID """
 
-    data = {'value': 'asdf'}
-    request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
-    _id = response['id']
-    assert request.status_code == 201
+    _id = existing_impact
 
-    request = client.get('/api/indicators/impact/{}'.format(_id))
-    response = json.loads(request.data.decode())
+    request = client.get(f'/api/indicators/impact/{_id}')
+    response = request.get_json()
     assert request.status_code == 200
     assert response['id'] == _id
     assert response['value'] == 'asdf'
@@ -231,134 +202,69 @@ def test_update_schema(client):
     # Invalid JSON
     data = {}
     request = client.put('/api/indicators/impact/1', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert response['msg'] == 'Request must include valid JSON'
 
     # Missing required value parameter
     data = {'asdf': 'asdf'}
     request = client.put('/api/indicators/impact/1', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert response['msg'] == "Request JSON does not match schema: 'value' is a required property"
 
     # Additional parameter
     data = {'value': 'asdf', 'asdf': 'asdf'}
     request = client.put('/api/indicators/impact/1', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert 'Additional properties are not allowed' in response['msg']
 
     # Invalid value parameter type
     data = {'value': 1}
     request = client.put('/api/indicators/impact/1', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert "1 is not of type 'string'" in response['msg']
 
     # value parameter too short
     data = {'value': ''}
     request = client.put('/api/indicators/impact/1', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert 'too short' in response['msg']
 
     # value parameter too long
     data = {'value': 'a' * 256}
     request = client.put('/api/indicators/impact/1', json=data)
-    response = json.loads(request.data.decode())
+    response = request.get_json()
     assert request.status_code == 400
     assert 'too long' in response['msg']
 
 
-def test_update_nonexistent_id(client):
-    """ Ensure a nonexistent ID does not work """
-
-    data = {'value': 'asdf'}
-    request = client.put('/api/indicators/impact/100000', json=data)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 404
-    assert response['msg'] == 'Indicator impact ID not found'
-
-
-def test_update_duplicate(client):
+def test_update_duplicate(client, existing_impact):
     """ Ensure duplicate records cannot be updated """
 
-    data = {'value': 'asdf'}
-    request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
-    _id = response['id']
-    assert request.status_code == 201
+    _id = existing_impact
 
     data = {'value': 'asdf'}
-    request = client.put('/api/indicators/impact/{}'.format(_id), json=data)
-    response = json.loads(request.data.decode())
+    request = client.put(f'/api/indicators/impact/{_id}', json=data)
+    response = request.get_json()
     assert request.status_code == 409
     assert response['msg'] == 'Indicator impact already exists'
 
 
-def test_update_missing_api_key(app, client):
-    """ Ensure an API key is given if the config requires it """
-
-    app.config['PUT'] = 'analyst'
-
-    request = client.put('/api/indicators/impact/1')
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'Bad or missing API key'
-
-
-def test_update_invalid_api_key(app, client):
-    """ Ensure an API key not found in the database does not work """
-
-    app.config['PUT'] = 'analyst'
-
-    headers = {'Authorization': 'Apikey ' + TEST_INVALID_APIKEY}
-    request = client.put('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'API user does not exist'
-
-
-def test_update_inactive_api_key(app, client):
-    """ Ensure an inactive API key does not work """
-
-    app.config['PUT'] = 'analyst'
-
-    headers = {'Authorization': 'Apikey ' + TEST_INACTIVE_APIKEY}
-    request = client.put('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'API user is not active'
-
-
-def test_update_invalid_role(app, client):
-    """ Ensure the given API key has the proper role access """
-
-    app.config['PUT'] = 'user_does_not_have_this_role'
-
-    headers = {'Authorization': 'Apikey ' + TEST_ANALYST_APIKEY}
-    request = client.put('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'Insufficient privileges'
-
-
-def test_update(client):
+def test_update(client, existing_impact):
     """ Ensure a proper request actually works """
 
-    data = {'value': 'asdf'}
-    request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
-    _id = response['id']
-    assert request.status_code == 201
+    _id = existing_impact
 
     data = {'value': 'asdf2'}
-    request = client.put('/api/indicators/impact/{}'.format(_id), json=data)
+    request = client.put(f'/api/indicators/impact/{_id}', json=data)
     assert request.status_code == 200
 
-    request = client.get('/api/indicators/impact/{}'.format(_id))
-    response = json.loads(request.data.decode())
+    request = client.get(f'/api/indicators/impact/{_id}')
+    response = request.get_json()
     assert request.status_code == 200
     assert response['id'] == _id
     assert response['value'] == 'asdf2'
@@ -369,62 +275,6 @@ DELETE TESTS
 """
 
 
-def test_delete_nonexistent_id(client):
-    """ Ensure a nonexistent ID does not work """
-
-    request = client.delete('/api/indicators/impact/100000')
-    response = json.loads(request.data.decode())
-    assert request.status_code == 404
-    assert response['msg'] == 'Indicator impact ID not found'
-
-
-def test_delete_missing_api_key(app, client):
-    """ Ensure an API key is given if the config requires it """
-
-    app.config['DELETE'] = 'admin'
-
-    request = client.delete('/api/indicators/impact/1')
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'Bad or missing API key'
-
-
-def test_delete_invalid_api_key(app, client):
-    """ Ensure an API key not found in the database does not work """
-
-    app.config['DELETE'] = 'admin'
-
-    headers = {'Authorization': 'Apikey ' + TEST_INVALID_APIKEY}
-    request = client.delete('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'API user does not exist'
-
-
-def test_delete_inactive_api_key(app, client):
-    """ Ensure an inactive API key does not work """
-
-    app.config['DELETE'] = 'admin'
-
-    headers = {'Authorization': 'Apikey ' + TEST_INACTIVE_APIKEY}
-    request = client.delete('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'API user is not active'
-
-
-def test_delete_invalid_role(app, client):
-    """ Ensure the given API key has the proper role access """
-
-    app.config['DELETE'] = 'user_does_not_have_this_role'
-
-    headers = {'Authorization': 'Apikey ' + TEST_ANALYST_APIKEY}
-    request = client.delete('/api/indicators/impact/1', headers=headers)
-    response = json.loads(request.data.decode())
-    assert request.status_code == 401
-    assert response['msg'] == 'Insufficient privileges'
-    
-    
 def test_delete_foreign_key(client):
     """ Ensure you cannot delete with foreign key constraints """
 
@@ -433,25 +283,21 @@ def test_delete_foreign_key(client):
     assert impact_request.status_code == 201
     assert indicator_request.status_code == 201
 
-    request = client.delete('/api/indicators/impact/{}'.format(impact_response['id']))
-    response = json.loads(request.data.decode())
+    request = client.delete(f"/api/indicators/impact/{impact_response['id']}")
+    response = request.get_json()
     assert request.status_code == 409
     assert response['msg'] == 'Unable to delete indicator impact due to foreign key constraints'
 
 
-def test_delete(client):
+def test_delete(client, existing_impact):
     """ Ensure a proper request actually works """
 
-    data = {'value': 'asdf'}
-    request = client.post('/api/indicators/impact', json=data)
-    response = json.loads(request.data.decode())
-    _id = response['id']
-    assert request.status_code == 201
+    _id = existing_impact
 
-    request = client.delete('/api/indicators/impact/{}'.format(_id))
+    request = client.delete(f'/api/indicators/impact/{_id}')
     assert request.status_code == 204
 
-    request = client.get('/api/indicators/impact/{}'.format(_id))
-    response = json.loads(request.data.decode())
+    request = client.get(f'/api/indicators/impact/{_id}')
+    response = request.get_json()
     assert request.status_code == 404
     assert response['msg'] == 'Indicator impact ID not found'
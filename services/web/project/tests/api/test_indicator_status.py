@@ -204,6 +204,31 @@ def test_read_all_values(client):
     assert len(response) == 3
 
 
+def test_read_all_values_etag(client):
+    """ Ensure the list of values honors its ETag and changes when a value is added """
+
+    data = {'value': 'asdf'}
+    request = client.post('/api/indicators/status', json=data)
+    assert request.status_code == 201
+
+    request = client.get('/api/indicators/status')
+    etag = request.headers['ETag']
+    assert request.status_code == 200
+
+    request = client.get('/api/indicators/status', headers={'If-None-Match': etag})
+    assert request.status_code == 304
+
+    data = {'value': 'asdf2'}
+    request = client.post('/api/indicators/status', json=data)
+    assert request.status_code == 201
+
+    request = client.get('/api/indicators/status', headers={'If-None-Match': etag})
+    response = json.loads(request.data.decode())
+    assert request.status_code == 200
+    assert request.headers['ETag'] != etag
+    assert len(response) == 2
+
+
 def test_read_by_id(client):
     """ Ensure names can be read by their ID """
 
@@ -220,6 +245,23 @@ def test_read_by_id(client):
     assert response['value'] == 'asdf'
 
 
+def test_read_by_id_etag(client):
+    """ Ensure reading a value by its ID honors its ETag """
+
+    data = {'value': 'asdf'}
+    request = client.post('/api/indicators/status', json=data)
+    response = json.loads(request.data.decode())
+    _id = response['id']
+    assert request.status_code == 201
+
+    request = client.get('/api/indicators/status/{}'.format(_id))
+    etag = request.headers['ETag']
+    assert request.status_code == 200
+
+    request = client.get('/api/indicators/status/{}'.format(_id), headers={'If-None-Match': etag})
+    assert request.status_code == 304
+
+
 """
 UPDATE TESTS
 """
@@ -605,9 +605,11 @@ def test_update_nonexistent_id(client):
     assert response['msg'] == 'User ID not found'
 
 
-def test_update_duplicate(client):
+def test_update_duplicate(app, client):
     """ Ensure duplicate records cannot be updated """
 
+    app.config['MINIMUM_PASSWORD_LENGTH'] = 4
+
     headers = create_auth_header(TEST_ADMIN_APIKEY)
 
     data = {'email': 'asdf', 'first_name': 'asdf', 'last_name': 'asdf',
@@ -834,9 +836,11 @@ def test_delete_invalid_role(app, client):
     assert response['msg'] == 'Insufficient privileges'
 
 
-def test_delete_foreign_key_indicator(client):
+def test_delete_foreign_key_indicator(app, client):
     """ Ensure you cannot delete with foreign key constraints """
 
+    app.config['MINIMUM_PASSWORD_LENGTH'] = 4
+
     headers = create_auth_header(TEST_ADMIN_APIKEY)
 
     user_request, user_response = create_user(client, TEST_ADMIN_APIKEY, 'asdf@asdf.com', 'asdf', 'asdf', 'asdf', ['analyst'], 'some_guy')
@@ -850,9 +854,11 @@ def test_delete_foreign_key_indicator(client):
     assert response['msg'] == 'Unable to delete user due to foreign key constraints'
 
 
-def test_delete_foreign_key_reference(client):
+def test_delete_foreign_key_reference(app, client):
     """ Ensure you cannot delete with foreign key constraints """
 
+    app.config['MINIMUM_PASSWORD_LENGTH'] = 4
+
     headers = create_auth_header(TEST_ADMIN_APIKEY)
 
     user_request, user_response = create_user(client, TEST_ADMIN_APIKEY, 'asdf@asdf.com', 'asdf', 'asdf', 'asdf', ['analyst'], 'some_guy')
@@ -866,9 +872,11 @@ def test_delete_foreign_key_reference(client):
     assert response['msg'] == 'Unable to delete user due to foreign key constraints'
 
 
-def test_delete(client):
+def test_delete(app, client):
     """ Ensure a proper request actually works """
 
+    app.config['MINIMUM_PASSWORD_LENGTH'] = 4
+
     headers = create_auth_header(TEST_ADMIN_APIKEY)
 
     data = {'email': 'asdf', 'first_name': 'asdf', 'last_name': 'asdf',
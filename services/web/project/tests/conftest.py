@@ -1,11 +1,17 @@
+import copy
+import logging
+import os
 import pytest
 
 from flask_security import SQLAlchemyUserDatastore
 from flask_security.utils import hash_password
+from sqlalchemy import DateTime, create_engine, event, exc
+from sqlalchemy.dialects.sqlite import DATETIME
+from sqlalchemy.engine.url import make_url
 
 from project import create_app
 from project import db as _db
-from project.models import Role, User
+from project.models import IndicatorImpact, Role, User
 
 
 TEST_INACTIVE_APIKEY = '11111111-1111-1111-1111-111111111111'
@@ -14,18 +20,76 @@ TEST_ANALYST_APIKEY = '33333333-3333-3333-3333-333333333333'
 TEST_INVALID_APIKEY = '99999999-9999-9999-9999-999999999999'
 
 
+class WholeSecondDATETIME(DATETIME):
+    """ SQLite DATETIME that drops the microseconds, like MySQL's DATETIME does. """
+
+    def __init__(self, *args, **kwargs):
+        kwargs['truncate_microseconds'] = True
+        super().__init__(*args, **kwargs)
+
+
+def worker_database_uri(uri, worker_id):
+    """ Returns the database URI for the given pytest-xdist worker, creating the database if needed. """
+
+    url = make_url(uri)
+
+    # SQLite databases are just files, so give each worker its own file.
+    if url.get_backend_name() == 'sqlite':
+        if url.database:
+            root, ext = os.path.splitext(url.database)
+            url.database = '{}_{}{}'.format(root, worker_id, ext)
+        return str(url)
+
+    url.database = '{}_test_{}'.format(url.database, worker_id)
+
+    server_url = copy.copy(url)
+    server_url.database = None
+    server = create_engine(server_url)
+    try:
+        server.execute('CREATE DATABASE IF NOT EXISTS `{}`'.format(url.database))
+    except exc.OperationalError as e:
+        pytest.fail('Could not create the {} database. Make sure the database user has been granted privileges '
+                    'on the SIP_test_ databases: {}'.format(url.database, e), pytrace=False)
+    finally:
+        server.dispose()
+
+    return str(url)
+
+
 @pytest.fixture(scope='session')
-def app():
+def app(worker_id):
 
     _app = create_app()
+
+    # Nothing looks at the app's own log output during the tests.
+    log_level = _app.logger.level
+    _app.logger.setLevel(logging.CRITICAL)
     _app.config.from_object('project.config.TestingConfig')
 
+    # Hashing the test users' passwords only slows the tests down. Flask-Security already built its password context
+    # in create_app, so switch that over too.
+    _app.config['SECURITY_PASSWORD_HASH'] = 'plaintext'
+    security = _app.extensions['security']
+    security.password_hash = 'plaintext'
+    security.pwd_context = security.pwd_context.copy(default='plaintext')
+
+    # Give each pytest-xdist worker its own database so they can run at the same time.
+    if worker_id != 'master':
+        _app.config['SQLALCHEMY_DATABASE_URI'] = worker_database_uri(_app.config['SQLALCHEMY_DATABASE_URI'], worker_id)
+
+    # Tests assume that no roles are required unless they say otherwise.
+    _app.config['POST'] = None
+    _app.config['GET'] = None
+    _app.config['PUT'] = None
+    _app.config['DELETE'] = None
+
     ctx = _app.app_context()
     ctx.push()
 
     yield _app
 
     ctx.pop()
+    _app.logger.setLevel(log_level)
 
 
 @pytest.fixture(scope='session')
@@ -36,6 +100,29 @@ def client(app):
 @pytest.fixture(scope='session')
 def db(app):
     _db.app = app
+
+    # The pysqlite driver manages transactions on its own and breaks SAVEPOINT, so make it leave that to SQLAlchemy.
+    # SQLite also needs to be told to enforce foreign keys, and it needs a stand-in for MySQL's BINARY().
+    if _db.engine.dialect.name == 'sqlite':
+        @event.listens_for(_db.engine, 'connect')
+        def sqlite_connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+            dbapi_connection.execute('PRAGMA foreign_keys=ON')
+            dbapi_connection.create_function('binary', 1, lambda value: value)
+
+        @event.listens_for(_db.engine, 'begin')
+        def sqlite_begin(connection):
+            connection.execute('BEGIN')
+
+        # MySQL's DATETIME only keeps whole seconds, which is also all the API returns, so have this engine's dialect
+        # store them the same way. The models themselves are left alone.
+        colspecs = dict(_db.engine.dialect.colspecs)
+        colspecs[DateTime] = WholeSecondDATETIME
+        _db.engine.dialect.colspecs = colspecs
+
+        # Throw away any connection that was opened before the listeners existed.
+        _db.engine.dispose()
+
     _db.create_all()
 
     # Admin role
@@ -84,11 +171,46 @@ def db(app):
 
 
 @pytest.fixture(scope='function', autouse=True)
-def session(app, db):
-    app.config['POST'] = None
-    app.config['GET'] = None
-    app.config['PUT'] = None
-    app.config['DELETE'] = None
+def config(app):
+    # Put back any config values that the test changed.
+    saved = dict(app.config)
+
+    yield app.config
+
+    app.config.clear()
+    app.config.update(saved)
+
+
+@pytest.fixture(scope='function', autouse=True)
+def session(request, app, db):
+    # Tests marked readonly never write to the database, so they can skip the transaction and SAVEPOINT.
+    if request.node.get_closest_marker('readonly'):
+        _session = db.create_scoped_session()
+        writes = []
+
+        # Nothing would roll back a write here, so stop it before it reaches the database and fail the test.
+        @event.listens_for(_session, 'before_flush')
+        def block_flush(session, flush_context, instances):
+            writes.append('flush')
+            raise RuntimeError('A test marked readonly tried to write to the database')
+
+        @event.listens_for(_session, 'after_bulk_update')
+        def record_bulk_update(update_context):
+            writes.append('bulk update')
+
+        @event.listens_for(_session, 'after_bulk_delete')
+        def record_bulk_delete(delete_context):
+            writes.append('bulk delete')
+
+        db.session = _session
+
+        yield _session
+
+        _session.remove()
+        if writes:
+            pytest.fail('A test marked readonly tried to write to the database ({}), so it must not be marked '
+                        'readonly'.format(', '.join(writes)), pytrace=False)
+        return
 
     connection = db.engine.connect()
     transaction = connection.begin()
@@ -96,10 +218,30 @@ def session(app, db):
     options = dict(bind=connection, binds={})
     _session = db.create_scoped_session(options=options)
 
+    # Run each test inside of a SAVEPOINT. When the code under test calls commit() or rollback(), only the
+    # SAVEPOINT ends, so start a new one to keep everything inside of the outer transaction.
+    _session.begin_nested()
+
+    @event.listens_for(_session, 'after_transaction_end')
+    def restart_savepoint(session, trans):
+        if trans.nested and not trans._parent.nested:
+            session.expire_all()
+            session.begin_nested()
+
     db.session = _session
 
     yield _session
 
+    _session.remove()
     transaction.rollback()
     connection.close()
-    _session.remove()
+
+
+@pytest.fixture(scope='function')
+def existing_impact(session):
+    """ Creates the indicator impact 'asdf' and returns its ID. """
+
+    impact = IndicatorImpact(value='asdf')
+    session.add(impact)
+    session.commit()
+    return impact.id
@@ -0,0 +1,7 @@
+from project import create_app, warm_up
+
+app = create_app()
+
+# Only the web server pays for warming up. The manage.py and flask commands create the app without it.
+if app.config['WARM_ON_START']:
+    warm_up(app)
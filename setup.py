@@ -56,6 +56,9 @@ CREATE USER '{user}'@'localhost' IDENTIFIED BY '{password}';
 
 GRANT ALL PRIVILEGES ON SIP.* TO '{user}'@localhost;
 GRANT ALL PRIVILEGES ON SIP.* TO '{user}'@'%';
+
+GRANT ALL PRIVILEGES ON `SIP\\_test\\_%`.* TO '{user}'@localhost;
+GRANT ALL PRIVILEGES ON `SIP\\_test\\_%`.* TO '{user}'@'%';
 """
 
 MYSQL_DOCKER_ENV = """MYSQL_HOST=localhost